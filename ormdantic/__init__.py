@@ -6,7 +6,8 @@ from .schema import (
     IdStr, IntegerArrayIndex, update_forward_refs, StoredFieldDefinitions
 )
 from .database import (
-    DatabaseConnectionPool, create_table, upsert_objects, find_object, find_objects, delete_objects
+    DatabaseConnectionPool, create_table, upsert_objects, find_object, find_objects,
+    find_objects_batched, delete_objects
 )
 
 
@@ -17,6 +18,7 @@ __all__ = [
     "upsert_objects",
     "find_object",
     "find_objects",
+    "find_objects_batched",
     "delete_objects",
     "update_forward_refs",
     "ModelT",
@@ -1,5 +1,7 @@
 from .connections import DatabaseConnectionPool
-from .storage import create_table, upsert_objects, find_object, find_objects, delete_objects
+from .storage import (
+    create_table, upsert_objects, find_object, find_objects, find_objects_batched, delete_objects
+)
 
 __all__ = [
     "DatabaseConnectionPool",
@@ -7,5 +9,6 @@ __all__ = [
     "upsert_objects",
     "find_object",
     "find_objects",
+    "find_objects_batched",
     "delete_objects"
 ]
\ No newline at end of file
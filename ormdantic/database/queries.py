@@ -1,13 +1,15 @@
 from typing import (
     Type, Iterator, overload, Iterable, List, Tuple, cast, Dict, 
-    Any, DefaultDict, Optional, get_args, Set
+    Any, DefaultDict, Optional, get_args, Set, Mapping
 )
 from datetime import datetime, date
 from decimal import Decimal
 from collections import defaultdict
+from types import MappingProxyType
 import itertools
 import functools
 
+import orjson
 from pydantic import ConstrainedStr, ConstrainedDecimal
 from pymysql.cursors import DictCursor
 
@@ -22,8 +24,7 @@ from ..schema.base import (
     UniqueIndexMixin, get_container_type, 
     get_field_names_for, get_part_types, is_field_list_or_tuple_of,
     PersistentModel, is_list_or_tuple_of, get_stored_fields,
-    get_stored_fields_for
-
+    get_stored_fields_for, register_cache_clearer, JsonPathAndType
 )
 
 _MAX_VAR_CHAR_LENGTH = 200
@@ -51,7 +52,7 @@ _FULL_TEXT_SEARCH_OPTION = r"""COMMENT 'parser "TokenBigramIgnoreBlankSplitSymbo
 
 
 Where = Tuple[Tuple[str, str, Any], ...]
-FieldOp = Tuple[Tuple[str, str]]
+FieldOp = Tuple[Tuple[str, str], ...]
 
 _logger = get_logger(__name__)
 
@@ -74,6 +75,9 @@ def field_exprs(fields:str | Iterable[str], table_name:str='') -> str | Iterator
 
         return _f(fields)
     else:
+        if not table_name:
+            return map(_f, fields)
+
         return map(lambda f: field_exprs(f, table_name), fields)
 
 
@@ -89,13 +93,13 @@ def join_line(*lines:str | Iterable[str],
               new_line: bool = True, use_comma: bool = False) -> str:
     sep = (',' if use_comma else '') + ('\n' if new_line else '')
 
-    return (
-        sep.join(
-            line 
-            for line in itertools.chain(*[[l] if isinstance(l, str) else l for l in lines]) 
-            if line
-        ) 
-    )
+    # str.join makes a list from generator internally, so we pass the list directly.
+    return sep.join([
+        line
+        for l in lines
+        for line in ((l,) if isinstance(l, str) else l)
+        if line
+    ])
 
 
 def _alias_table(old_table:str, table_name:str) -> str:
@@ -124,7 +128,16 @@ def tab_each_line(*statements:Iterable[str] | str, use_comma: bool = False) -> s
     return join_line(['  ' + item for item in line.split('\n')], use_comma=False, new_line=True)
 
 
-def get_sql_for_creating_table(type_:Type[PersistentModelT]):
+def get_sql_for_creating_table(type_:Type[PersistentModelT]) -> Iterator[str]:
+    yield from _get_sqls_for_creating_table(type_)
+
+
+@functools.cache
+def _get_sqls_for_creating_table(type_:Type[PersistentModelT]) -> Tuple[str, ...]:
+    return tuple(_iterate_sql_for_creating_table(type_))
+
+
+def _iterate_sql_for_creating_table(type_:Type[PersistentModelT]) -> Iterator[str]:
     stored = get_stored_fields(type_)
 
     if issubclass(type_, PartOfMixin):
@@ -272,7 +285,7 @@ def _get_part_table_fields() -> Iterator[str]:
     yield f'{field_exprs(_JSON_PATH_FIELD)} VARCHAR(255)'
 
 
-def _get_table_stored_fields(stored_fields:StoredFieldDefinitions, json_stored:bool = False) -> Iterator[str]:
+def _get_table_stored_fields(stored_fields:Mapping[str, JsonPathAndType], json_stored:bool = False) -> Iterator[str]:
     for field_name, (paths, field_type) in stored_fields.items():
         stored = '' if not json_stored else _generate_stored_for_json_path(paths, field_type)
         yield f"""{field_exprs(field_name)} {_get_field_db_type(field_type)}{stored}"""
@@ -284,17 +297,17 @@ def _get_view_fields(fields:Dict[str, Tuple[str, ...]]) -> Iterator[str]:
             yield f'{field_exprs(field_name, table_name)}'
 
 
-def _get_table_indexes(stored_fields:StoredFieldDefinitions) -> Iterator[str]:
+def _get_table_indexes(stored_fields:Mapping[str, JsonPathAndType]) -> Iterator[str]:
+    full_text_searched_fields = []
+
     for field_name, (_, field_type) in stored_fields.items():
         key_def = _generate_key_definition(field_type)
 
         if key_def: 
             yield f"""{key_def} `{field_name}_index` ({field_exprs(field_name)})"""
 
-    full_text_searched_fields = set(
-        field_name for field_name, (_, field_type) in stored_fields.items()
-        if is_derived_from(field_type, FullTextSearchedMixin)
-    )
+        if is_derived_from(field_type, FullTextSearchedMixin):
+            full_text_searched_fields.append(field_name)
 
     if full_text_searched_fields:
         yield f'''FULLTEXT INDEX `ft_index` ({
@@ -318,6 +331,7 @@ def _get_external_index_table_indexes(field_name:str, field_type:Type) -> Iterat
     #    yield f"""FULLTEXT INDEX `ft_index` ({field_exprs(field_name)}) {_FULL_TEXT_SEARCH_OPTION}"""
 
 
+@functools.cache
 def _get_field_db_type(type_:Type) -> str:
     if type_ is bool:
         return 'BOOL'
@@ -351,6 +365,8 @@ def _get_field_db_type(type_:Type) -> str:
     raise RuntimeError(f'{type_} is not the supported type in database.')
 
 
+# the names are limited to schema fields and expressions, so they are cached.
+@functools.lru_cache(maxsize=4096)
 def _f(field:str) -> str:
     field = field.strip()
 
@@ -389,14 +405,32 @@ def _generate_key_definition(type_:Type) -> str:
 
 
 def get_query_and_args_for_upserting(model:PersistentModel):
+    return get_sql_for_upserting(cast(Type, type(model))), get_args_for_upserting(model)
+
+
+def get_args_for_upserting(model:PersistentModel) -> Dict[str, Any]:
     query_args : Dict[str, Any] = {}
 
     for f in _get_identifying_fields(type(model)):
         query_args[f] = getattr(model, f) 
 
-    query_args[_JSON_FIELD] = model.json()
+    # model.json() decodes the bytes from orjson as str, and driver encodes it again.
+    # so, we pass the bytes directly unless the model dumps json in its own way.
+    if _is_dumped_by_orjson(type(model)):
+        query_args[_JSON_FIELD] = orjson.dumps(model.dict(), default=model.__json_encoder__)
+    else:
+        query_args[_JSON_FIELD] = model.json()
 
-    return _get_sql_for_upserting(cast(Type, type(model))), query_args
+    return query_args
+
+
+@functools.cache
+def _is_dumped_by_orjson(model_type:Type[PersistentModelT]) -> bool:
+    return (
+        model_type.__config__.json_dumps is PersistentModel.__config__.json_dumps
+        and model_type.json is PersistentModel.json
+        and not model_type.__custom_root_type__
+    )
 
 
 def _get_identifying_fields(model_type:Type[PersistentModelT]) -> Tuple[str]:
@@ -406,7 +440,7 @@ def _get_identifying_fields(model_type:Type[PersistentModelT]) -> Tuple[str]:
             
 
 @functools.lru_cache
-def _get_sql_for_upserting(model_type:Type):
+def get_sql_for_upserting(model_type:Type) -> str:
     fields = _get_identifying_fields(model_type)
 
     return join_line(
@@ -419,17 +453,41 @@ def _get_sql_for_upserting(model_type:Type):
         f'VALUES (',
         tab_each_line(
             '%(__json)s',
-            [f'%({f})s' for f in fields],
+            [_get_placeholder(f) for f in fields],
             use_comma=True
         ),
         ')',
         f'ON DUPLICATE KEY UPDATE',
         tab_each_line(
-            f'{field_exprs(_JSON_FIELD)} = %(__json)s'
+            # VALUES() refers the row itself, so the sql can be used by executemany.
+            f'{field_exprs(_JSON_FIELD)} = VALUES({field_exprs(_JSON_FIELD)})'
         )
     ) 
 
 
+def get_query_and_args_for_reading_row_ids(model_type:Type,
+                                           args_list:Iterable[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]] | None:
+    # the rows which are upserted by identifying fields can be found again by them.
+    fields = _get_identifying_fields(model_type)
+
+    if not fields:
+        return None
+
+    return _get_sql_for_reading_row_ids(model_type), {
+        '__identifiers': tuple(tuple(args[f] for f in fields) for args in args_list)
+    }
+
+
+@functools.lru_cache
+def _get_sql_for_reading_row_ids(model_type:Type) -> str:
+    fields = _get_identifying_fields(model_type)
+
+    return join_line(
+        f'SELECT {field_exprs(_ROW_ID_FIELD)} FROM {get_table_name(model_type)}',
+        f'WHERE ({join_line(field_exprs(fields), new_line=False, use_comma=True)}) IN %(__identifiers)s'
+    )
+
+
 # At first, I would use the JSON_TABLE function in mariadb. 
 # but it does not support the object or array type for field 
 # value of result.  
@@ -463,18 +521,22 @@ def _get_sql_for_upserting(model_type:Type):
 #   _order
 # 
 
-def get_sql_for_upserting_parts_table(model_type:Type) -> Dict[Type, Tuple[str, ...]]:
-    type_sqls : Dict[str, Tuple[str, str]] = {}
+# sql for parts is only depends on type. so, it is cached.
+@functools.cache
+def get_sql_for_upserting_parts_table(model_type:Type) -> MappingProxyType[Type, Tuple[str, ...]]:
+    type_sqls : Dict[Type, Tuple[str, ...]] = {}
     part_types = get_part_types(model_type)
 
     is_root = not is_derived_from(model_type, PartOfMixin)
-    sqls = []
     
     for part_type in part_types:
         part_fields = get_field_names_for(model_type, part_type)
 
         assert part_fields
 
+        # sqls are collected for each part type.
+        sqls = []
+
         delete_sql = join_line([
             f'DELETE FROM {get_table_name(part_type, _PART_BASE_TABLE)}',
             f'WHERE {field_exprs(_ROOT_ROW_ID_FIELD)} = %(__root_row_id)s'
@@ -491,13 +553,13 @@ def get_sql_for_upserting_parts_table(model_type:Type) -> Dict[Type, Tuple[str,
 
         root_field = 'CONTAINER.' + (field_exprs(_ROW_ID_FIELD) if is_root else field_exprs(_ROOT_ROW_ID_FIELD))
 
+        fields_from_json_table = [f for f in target_fields if f in fields and fields[f][0][0] != '..']
+        fields_from_container_json = [f for f in target_fields if f in fields and fields[f][0][0] == '..']
+
         for part_field in part_fields:
             is_collection = is_field_list_or_tuple_of(model_type, part_field)
             json_path = f'$.{part_field}'
 
-            fields_from_json_table = [f for f in target_fields if f in fields and fields[f][0][0] != '..']
-            fields_from_container_json = [f for f in target_fields if f in fields and fields[f][0][0] == '..']
-
             insert_sql = join_line([
                 f'INSERT INTO {get_table_name(part_type, _PART_BASE_TABLE)}',
                 f'(',
@@ -554,10 +616,15 @@ def get_sql_for_upserting_parts_table(model_type:Type) -> Dict[Type, Tuple[str,
 
         type_sqls[part_type] = tuple(sqls)
 
-    return type_sqls
+    return MappingProxyType(type_sqls)
 
 
-def get_sql_for_upserting_external_index_table(model_type:Type) -> Iterator[str]:
+@functools.cache
+def get_sql_for_upserting_external_index_table(model_type:Type) -> Tuple[str, ...]:
+    return tuple(_iterate_sql_for_upserting_external_index_table(model_type))
+
+
+def _iterate_sql_for_upserting_external_index_table(model_type:Type) -> Iterator[str]:
     is_part = is_derived_from(model_type, PartOfMixin)
 
     for field_name, (json_paths, field_type) in get_stored_fields_for_external_index(model_type).items():
@@ -721,19 +788,39 @@ def get_query_and_args_for_reading(type_:Type[PersistentModelT], fields:Tuple[st
 
         *join : will indicate the some model joined.
     '''
-    fields = convert_tuple(fields)
+    # sql is only depends on the shape of where. so, we don't pass the value of where.
+    sql, variables = _get_sql_and_variables_for_reading(
+        type_,
+        convert_tuple(fields),
+        tuple((f, o) for f, o, _ in where),
+        convert_tuple(order_by), offset, limit,
+        convert_tuple(unwind),
+        tuple((ns_types or {}).items()),
+        base_type, for_count
+    )
 
-    unwind = convert_tuple(unwind)
-    order_by = convert_tuple(order_by)
+    return sql, {variable:value for variable, (_, _, value) in zip(variables, where)}
 
-    where = _fill_empty_fields_for_match(where, 
-                                         get_stored_fields_for_full_text_search(type_))
+
+@functools.lru_cache()
+def _get_sql_and_variables_for_reading(type_:Type[PersistentModelT],
+                                       fields: Tuple[str, ...],
+                                       field_ops: FieldOp,
+                                       order_by: Tuple[str, ...],
+                                       offset: int | None,
+                                       limit: int | None,
+                                       unwind: Tuple[str, ...],
+                                       joined: Tuple[Tuple[str, Type], ...],
+                                       base_type: Type[PersistentModelT] | None,
+                                       for_count: bool) -> Tuple[str, Tuple[str, ...]]:
+    field_ops = _fill_empty_fields_for_match(field_ops, 
+                                             get_stored_fields_for_full_text_search(type_))
 
     ns_types = dict(
         _build_namespace_types(
-            type_, ns_types or {},
+            type_, joined,
             _build_namespace_set(
-                _merge_fields_and_where_fields(fields, where))
+                _merge_fields_and_where_fields(fields, field_ops))
         )
     )
 
@@ -741,11 +828,11 @@ def get_query_and_args_for_reading(type_:Type[PersistentModelT], fields:Tuple[st
         _get_sql_for_reading(
             tuple(ns_types.items()), 
             fields, 
-            tuple((f, o) for f, o, _ in where), 
+            field_ops, 
             order_by, offset, limit, 
             unwind, 
             cast(Type, base_type), for_count), 
-        _build_database_args(where)
+        tuple(_get_parameter_variable_for_multiple_fields(f) for f, _ in field_ops)
     )
 
     # first, we make a group for each table.
@@ -756,17 +843,30 @@ def get_query_and_args_for_reading(type_:Type[PersistentModelT], fields:Tuple[st
     # {'':['name'] 'person': ['name', 'age']}
 
 
+def get_where_and_order_by_after_row_id(where:Where, order_by:Tuple[str, ...] | str, 
+                                        after_row_id:int) -> Tuple[Where, Tuple[str, ...]]:
+    '''
+        Get where and order_by for reading the rows after the given row id.
+        it will be used for paging instead of offset.
+    '''
+    if convert_tuple(order_by):
+        _logger.fatal(f'{order_by=} is given with {after_row_id=}. the rows should be ordered by row id.')
+        raise RuntimeError('order_by cannot be used with after_row_id.')
+
+    return where + ((_ROW_ID_FIELD, '>', after_row_id),), (_ROW_ID_FIELD,)
+
+
 # check fields and where for requiring the join.
-def _merge_fields_and_where_fields(fields:Tuple[str,...], where:Where) -> Tuple[str, ...]:
-    return tuple(itertools.chain(fields, (w[0] for w in where)))
+def _merge_fields_and_where_fields(fields:Tuple[str,...], field_ops:FieldOp) -> Tuple[str, ...]:
+    return tuple(itertools.chain(fields, (fo[0] for fo in field_ops)))
 
 
-def _fill_empty_fields_for_match(where:Where, fields:Iterable[str]) -> Where:
+def _fill_empty_fields_for_match(field_ops:FieldOp, fields:Iterable[str]) -> FieldOp:
     fields_expr = ','.join(fields)
 
     return tuple(
-        (fields_expr, w[1], w[2]) if w[1] == 'match' and not w[0] else w
-        for w in where
+        (fields_expr, fo[1]) if fo[1] == 'match' and not fo[0] else fo
+        for fo in field_ops
     )
 
 
@@ -881,7 +981,7 @@ def _extract_fields_for_order_by(order_by:Tuple[str], ns:str) -> List[str]:
 
 
 def _extract_fields_for_join(
-    join_keys:Dict[Tuple[Type, Type], Tuple[str, str]], 
+    join_keys:MappingProxyType[Tuple[Type, Type], Tuple[str, str]], 
     ns_type:Type) -> List[str]:
     fields = []
 
@@ -908,7 +1008,7 @@ def _extract_fields(items:Iterable[str], ns:str) -> Tuple[str,...]:
         started = len(removed)
 
         return tuple(item[started:] for item in items 
-            if item.startswith(removed) and '.' not in item[started:])
+            if item.startswith(removed) and item.find('.', started) < 0)
 
 
 def get_query_and_args_for_deleting(type_:Type, where:Where):
@@ -922,11 +1022,44 @@ def _get_sql_for_deleting(type_:Type, field_and_value:FieldOp):
     return f'DELETE FROM {get_table_name(type_)} {_build_where(field_and_value)}'
 
 
+def get_query_and_args_for_finding_row_ids(type_:Type, where:Where):
+    query_args = _build_database_args(where)
+
+    return _get_sql_for_finding_row_ids(type_, tuple((f, o) for f, o, _ in where)), query_args
+
+
+@functools.lru_cache
+def _get_sql_for_finding_row_ids(type_:Type, field_and_value:FieldOp):
+    return f'SELECT {field_exprs(_ROW_ID_FIELD)} FROM {get_table_name(type_)} {_build_where(field_and_value)}'
+
+
+# rows of parts and externals keep the row id of root. so, they can be 
+# deleted by the row ids of root.
+@functools.cache
+def get_sqls_for_deleting_parts_and_externals(type_:Type) -> Tuple[str, ...]:
+    return tuple(
+        join_line([
+            f'DELETE FROM {table_name}',
+            f'WHERE {field_exprs(_ROOT_ROW_ID_FIELD)} IN %(__root_row_ids)s'
+        ])
+        for table_name in _iterate_table_names_of_parts_and_externals(type_)
+    )
+
+
+def _iterate_table_names_of_parts_and_externals(type_:Type) -> Iterator[str]:
+    for field_name in get_stored_fields_for_external_index(type_):
+        yield get_table_name(type_, field_name)
+
+    for part_type in get_part_types(type_):
+        yield from _iterate_table_names_of_parts_and_externals(part_type)
+        yield get_table_name(part_type, _PART_BASE_TABLE)
+
+
 def _build_database_args(where:Where) -> Dict[str, Any]:
     return {_get_parameter_variable_for_multiple_fields(field):value for field, _, value in where}
 
 
-def _build_where(field_and_ops:FieldOp | Tuple[Tuple[str, str, str]], ns:str = '') -> str:
+def _build_where(field_and_ops:FieldOp | Tuple[Tuple[str, str, str], ...], ns:str = '') -> str:
     if field_and_ops:
         return join_line(
             'WHERE',
@@ -978,14 +1111,19 @@ def _build_where_op(fields_op:Tuple[str, str] | Tuple[str, str, str], ns:str = '
     #if op == 'match':
     #    return _build_match(fields_op[0], variable, variable)
     else:
-        return f'{field_exprs(field)} {op} %({variable})s'
+        return f'{field_exprs(field)} {op} {_get_placeholder(variable)}'
+
+
+@functools.cache
+def _get_placeholder(variable:str) -> str:
+    return f'%({variable})s'
 
 
 def _build_match(fields:str, variable:str, table_name:str = ''):
     variable = _get_parameter_variable_for_multiple_fields(variable)
     field_items = field_exprs([f for f in fields.split(',')], table_name)
 
-    return f'MATCH ({join_line(field_items, new_line=False, use_comma=True)}) AGAINST (%({variable})s IN BOOLEAN MODE)'
+    return f'MATCH ({join_line(field_items, new_line=False, use_comma=True)}) AGAINST ({_get_placeholder(variable)} IN BOOLEAN MODE)'
 
 
 def _get_parameter_variable_for_multiple_fields(fields:str):
@@ -1017,21 +1155,22 @@ def _build_query_and_fields_for_core_table(
     # 4. fields which is looked up from base table by field_ops.
 
     matches = []
+    aliases = {f: _get_alias_for_unwind(f, unwind) for f in unwind}
     prefix_fields : DefaultDict[str, Dict[str, None]]= defaultdict(dict)
 
     prefix_fields['__ORG'][_ROW_ID_FIELD] = None
 
     for f in itertools.chain(fields, unwind):
-        prefix_fields[_get_alias_for_unwind(f, unwind)][f] = None
+        prefix_fields[aliases.get(f, '__ORG')][f] = None
 
     for f, op in field_ops:
         if op == 'match':
             matches.append(_build_match(f, f, '__ORG'))
         else:
-            prefix_fields[_get_alias_for_unwind(f, unwind)][f] = None
+            prefix_fields[aliases.get(f, '__ORG')][f] = None
 
     field_op_var = tuple(
-        (field_exprs(f, _get_alias_for_unwind(f, unwind)), o, f)
+        (field_exprs(f, aliases.get(f, '__ORG')), o, f)
         for f, o in field_ops if o != 'match'
     )
 
@@ -1050,10 +1189,10 @@ def _build_query_and_fields_for_core_table(
         itertools.chain(
             [_alias_table(get_table_name(target_type), '__ORG')],
             [
-                _alias_table(get_table_name(target_type, f), _get_alias_for_unwind(f, unwind)) 
+                _alias_table(get_table_name(target_type, f), alias) 
                 + f' ON {field_exprs(_ROW_ID_FIELD, "__ORG")} = '
-                + f'{field_exprs(_ROW_ID_FIELD, _get_alias_for_unwind(f, unwind))}'
-                for f in unwind
+                + f'{field_exprs(_ROW_ID_FIELD, alias)}'
+                for f, alias in aliases.items()
             ]
         )
     )
@@ -1082,7 +1221,7 @@ def _get_alias_for_unwind(f:str, unwind:Tuple[str], other:str = '__ORG') -> str:
 
 def _build_query_for_base_table(ns_types: Tuple[Tuple[str, PersistentModelT],...],
                                 core_table_queries: Dict[str, Tuple[str, Tuple[str,...]]],
-                                field_ops: Tuple[Tuple[str, str]],
+                                field_ops: FieldOp,
                                 order_by: Tuple[str, ...],
                                 offset: int | None,
                                 limit: int | None,
@@ -1095,7 +1234,7 @@ def _build_query_for_base_table(ns_types: Tuple[Tuple[str, PersistentModelT],...
 
     joined, fields = _build_join_for_ns(ns_types, core_table_queries, base_table_ns) 
 
-    nested_where : Tuple[Tuple[str, str]] = tuple()
+    nested_where : FieldOp = tuple()
 
     if _RELEVANCE_FIELD in tuple(_split_namespace(f)[1] for f in fields):
         nested_where = ((_RELEVANCE_FIELD, ''), )
@@ -1237,32 +1376,63 @@ def _add_namespace(field:str, ns:str) -> str:
     return field
 
 
-def _build_namespace_types(base_type:Type, join:Dict[str, Type], namespaces:Set[str]) -> Iterator[Tuple[str, Type]]:
+def _build_namespace_types(base_type:Type,
+                           join:Mapping[str, Type] | Tuple[Tuple[str, Type], ...],
+                           namespaces:Set[str]) -> Iterator[Tuple[str, Type]]:
     yield ('', base_type)
 
     yield from _build_join_from_refs(base_type, '', namespaces)
 
-    for field_name, field_type in join.items():
+    for field_name, field_type in (join.items() if isinstance(join, Mapping) else join):
         if any(field_name in ns for ns in namespaces):
             yield field_name, field_type
             yield from _build_join_from_refs(field_type, field_name + '.', namespaces)
 
 
 def _build_join_from_refs(current_type:Type, current_ns:str, namespaces:Set[str]) -> Iterator[Tuple[str, Type]]:
-    refs = get_stored_fields_for(current_type, ReferenceMixin)
+    # depth first walk with explicit stack, same order as the recursion.
+    stack = [(current_ns, iter(_get_referenced_types(current_type)))]
 
-    for field_name, (_, field_type) in refs.items():
-        if any(field_name in ns for ns in namespaces):
-            generic_type = get_base_generic_type_of(field_type, ReferenceMixin)
+    while stack:
+        ns, refs = stack[-1]
 
-            ref_type = get_args(generic_type)[0]
+        for field_name, _, ref_type in refs:
+            if any(field_name in target for target in namespaces):
+                yield ns + field_name, ref_type
 
-            yield current_ns + field_name, ref_type
+                stack.append((ns + field_name + '.', iter(_get_referenced_types(ref_type))))
+                break
+        else:
+            stack.pop()
 
-            yield from _build_join_from_refs(ref_type, current_ns + field_name + '.', namespaces)
+
+@functools.cache
+def _get_referenced_types(type_:Type) -> Tuple[Tuple[str, Type, Type], ...]:
+    return tuple(
+        (field_name, field_type, get_args(get_base_generic_type_of(field_type, ReferenceMixin))[0])
+        for field_name, (_, field_type) in get_stored_fields_for(type_, ReferenceMixin).items()
+    )
 
 
-def _find_join_keys(join:Tuple[Tuple[str, Type],...]) -> Dict[Tuple[Type, Type], Tuple[str, str]]:
+@register_cache_clearer
+def _clear_cached_sqls():
+    _get_sqls_for_creating_table.cache_clear()
+    _get_field_db_type.cache_clear()
+    get_sql_for_upserting.cache_clear()
+    _get_sql_for_reading_row_ids.cache_clear()
+    get_sql_for_upserting_parts_table.cache_clear()
+    get_sql_for_upserting_external_index_table.cache_clear()
+    _get_sql_and_variables_for_reading.cache_clear()
+    _get_sql_for_reading.cache_clear()
+    _get_sql_for_deleting.cache_clear()
+    _get_sql_for_finding_row_ids.cache_clear()
+    get_sqls_for_deleting_parts_and_externals.cache_clear()
+    _get_referenced_types.cache_clear()
+    _find_join_keys.cache_clear()
+
+
+@functools.lru_cache(maxsize=1024)
+def _find_join_keys(join:Tuple[Tuple[str, Type],...]) -> MappingProxyType[Tuple[Type, Type], Tuple[str, str]]:
     keys : Dict[Tuple[Type, Type], Tuple[str, str]] = {}
 
     targets = dict(join)
@@ -1284,16 +1454,12 @@ def _find_join_keys(join:Tuple[Tuple[str, Type],...]) -> Dict[Tuple[Type, Type],
 
         keys[(base_type, joined_type)] = (fields[0], fields[1])
 
-    return keys
+    return MappingProxyType(keys)
 
 
 def _find_join_key(base_type:Type, target_type:Type, reversed:bool = False) -> Tuple[str, str] | None:
-    refs = get_stored_fields_for(base_type, ReferenceMixin)
-
-    for field_name, (_, field_type) in refs.items():
-        generic_type = get_base_generic_type_of(field_type, ReferenceMixin)
-
-        if get_args(generic_type)[0] == target_type:
+    for field_name, field_type, ref_type in _get_referenced_types(base_type):
+        if ref_type == target_type:
             target_field = field_type._target_field
 
             if reversed:
@@ -1359,5 +1525,6 @@ def _get_populated_table_query_from_base(query_for_base:str,
     )
 
 
+@functools.lru_cache(maxsize=4096)
 def _normalize_database_object_name(value:str) -> str:
     return value.replace('.', '_').replace(',', '_').replace(' ', '').upper()
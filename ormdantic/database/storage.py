@@ -1,7 +1,9 @@
-from typing import Optional, Iterable, Type, Iterator, Dict, Any, Tuple, overload
-from collections import deque
+from typing import Optional, Iterable, Type, Iterator, Dict, Any, Tuple, DefaultDict, List, Deque, overload, cast
+from collections import deque, defaultdict
 from contextlib import contextmanager
+import functools
 
+import orjson
 from pydantic import BaseModel
 
 from ormdantic.schema.shareds import ( 
@@ -15,17 +17,19 @@ from .connections import DatabaseConnectionPool
 from ..schema import ModelT, PersistentModel, get_container_type
 from ..schema.base import (
     PartOfMixin, SchemaBaseModel, assign_identifying_fields_if_empty, get_part_types, 
-    PersistentModelT
+    PersistentModelT, construct_model, register_cache_clearer
 )
 from ..util import get_logger
 from .queries import (
     Where, execute_and_get_last_id, 
     get_sql_for_creating_table,
-    get_query_and_args_for_upserting, 
+    get_sql_for_upserting, get_args_for_upserting, get_query_and_args_for_reading_row_ids,
     get_query_and_args_for_reading, 
     get_sql_for_upserting_external_index_table, 
     get_sql_for_upserting_parts_table,
-    get_query_and_args_for_deleting,
+    get_query_and_args_for_deleting, get_query_and_args_for_finding_row_ids,
+    get_sqls_for_deleting_parts_and_externals,
+    get_where_and_order_by_after_row_id,
     _ROW_ID_FIELD, _JSON_FIELD
 )
 
@@ -35,13 +39,15 @@ from .queries import (
 _logger = get_logger(__name__)
 
 
-def build_where(items:Iterator[Tuple[str, str]] | Iterable[Tuple[str, str]]) -> Where:
-    return tuple((item[0], '=', item[1]) for item in items)
+def build_where(items:Iterator[Tuple[str, Any]] | Iterable[Tuple[str, Any]] | Dict[str, Any]) -> Where:
+    pairs = cast(Dict[str, Any], items).items() if isinstance(items, dict) else items
+
+    return tuple((field, '=', value) for field, value in pairs)
 
        
 def create_table(pool:DatabaseConnectionPool, *types:Type[PersistentModelT]):
     with pool.open_cursor(True) as cursor:
-        for type_ in _iterate_types_for_creating_order(types):
+        for type_ in _get_types_for_creating_order(types):
             for sql in get_sql_for_creating_table(type_):
                 cursor.execute(sql)
 
@@ -56,9 +62,9 @@ def upsert_objects(pool:DatabaseConnectionPool, models:Iterable[PersistentModelT
 def upsert_objects(pool:DatabaseConnectionPool, models:PersistentModelT | Iterable[PersistentModelT]):
     is_single = isinstance(models, PersistentModel)
 
-    model_list = [models] if is_single else models
+    model_list = [models] if is_single else tuple(models)
 
-    mixins = tuple(filter(lambda x: isinstance(x, PartOfMixin), model_list))
+    mixins = tuple(m for m in model_list if _is_part_of_type(type(m)))
 
     if mixins:
         _logger.debug(mixins)
@@ -67,22 +73,57 @@ def upsert_objects(pool:DatabaseConnectionPool, models:PersistentModelT | Iterab
 
     targets = tuple(assign_identifying_fields_if_empty(m) for m in model_list)
 
-    with pool.open_cursor(True) as cursor:
-        for model in targets:
-            model._before_save()
+    # models are grouped by type for upserting all rows of a table at once.
+    models_by_type : DefaultDict[Type, List[PersistentModel]] = defaultdict(list)
+
+    for model in targets:
+        model._before_save()
 
-            # we will remove content of the given model. so, we copy it and remove them.
-            # for not updating original model.
+        # we will remove content of the given model. so, we copy it and remove them.
+        # for not updating original model.
 
-            for sub_model in _iterate_extracted_persistent_shared_models(model):
-                inserted_id = execute_and_get_last_id(
-                    cursor, *get_query_and_args_for_upserting(sub_model))
+        for sub_model in _iterate_extracted_persistent_shared_models(model):
+            models_by_type[type(sub_model)].append(sub_model)
 
-                _upsert_parts_and_externals(cursor, inserted_id, type(sub_model))
+    with pool.open_cursor(True) as cursor:
+        # row id of each type will be collected for updating parts and externals
+        # at once.
+        inserted_ids = {
+            type_: _upsert_models(cursor, type_, sub_models) 
+            for type_, sub_models in models_by_type.items()
+        }
+
+        for type_, ids in inserted_ids.items():
+            _upsert_parts_and_externals(cursor, ids, type_)
 
     return targets[0] if is_single else targets
 
 
+def _upsert_models(cursor, type_:Type, models:List[PersistentModel]) -> Tuple[int, ...]:
+    sql = get_sql_for_upserting(type_)
+    args_list = [get_args_for_upserting(model) for model in models]
+
+    query_and_args = get_query_and_args_for_reading_row_ids(type_, args_list)
+
+    if len(args_list) == 1 or query_and_args is None:
+        # without identifying fields, every row is inserted as new one.
+        # so, the row id should be taken one by one. same row id can be 
+        # upserted several times, so dict is used for removing duplication.
+        return tuple(dict.fromkeys(
+            execute_and_get_last_id(cursor, sql, args) for args in args_list))
+
+    # executemany sends multiple rows in one insert statement.
+    cursor.executemany(sql, args_list)
+    cursor.execute(*query_and_args)
+
+    return tuple(row[_ROW_ID_FIELD] for row in cursor.fetchall())
+
+
+@functools.cache
+def _is_part_of_type(type_:Type) -> bool:
+    return is_derived_from(type_, PartOfMixin)
+
+
 def _iterate_extracted_persistent_shared_models(model:PersistentModel) -> Iterator[PersistentModel]:
     has_shared = has_shared_models(model)
 
@@ -99,33 +140,75 @@ def _iterate_extracted_persistent_shared_models(model:PersistentModel) -> Iterat
 
 def delete_objects(pool:DatabaseConnectionPool, type_:Type[PersistentModelT], where:Where):
     with pool.open_cursor(True) as cursor:
+        sqls = () if _is_part_of_type(type_) else get_sqls_for_deleting_parts_and_externals(type_)
+
+        if sqls:
+            cursor.execute(*get_query_and_args_for_finding_row_ids(type_, where))
+            root_row_ids = tuple(row[_ROW_ID_FIELD] for row in cursor.fetchall())
+
+            # rows of all parts and externals are deleted by one statement for each table.
+            if root_row_ids:
+                for sql in sqls:
+                    cursor.execute(sql, {'__root_row_ids': root_row_ids})
+
         cursor.execute(*get_query_and_args_for_deleting(type_, where))
 
 
 def find_object(pool:DatabaseConnectionPool, type_:Type[PersistentModelT], where:Where, 
-                *, concat_shared_models: bool = False) -> Optional[PersistentModelT]:
-    objs = list(query_records(pool, type_, where, 2))
+                *, concat_shared_models: bool = False,
+                validate: bool = False) -> Optional[PersistentModelT]:
+    # 2 records are enough to check whether the object is unique.
+    objs = list(query_records(pool, type_, where, limit=2))
 
     if len(objs) == 2:
         _logger.fatal(f'More than one object found. {type_=} {where=} in {pool=}. {[obj[_ROW_ID_FIELD] for obj in objs]}')
         raise RuntimeError(f'More than one object is found of {type_} condition {where}')
 
     if len(objs) == 1: 
-        with _context_for_shared_model(pool, concat_shared_models) as convert_model:
-            return convert_model(type_, objs[0])
+        with _context_for_shared_model(pool, concat_shared_models, validate) as convert_models:
+            return convert_models(type_, objs)[0]
 
     return None
 
 
 def find_objects(pool:DatabaseConnectionPool, type_:Type[PersistentModelT], where:Where, 
                 *, fetch_size: Optional[int] = None,
-                concat_shared_models: bool = False) -> Iterator[PersistentModelT]:
-
-    with _context_for_shared_model(pool, concat_shared_models) as convert_model:
-        for record in query_records(pool, type_, where, fetch_size, fields=(_JSON_FIELD, _ROW_ID_FIELD)):
-            model = convert_model(type_, record)
-
-            yield model
+                concat_shared_models: bool = False,
+                validate: bool = False,
+                limit: int | None = None,
+                after_row_id: int | None = None) -> Iterator[PersistentModelT]:
+    ''' if fetch_size is given, the models of fetched records are converted at once.
+    otherwise, each model is converted when it is iterated. '''
+
+    if fetch_size is not None:
+        for models in find_objects_batched(pool, type_, where, fetch_size=fetch_size,
+                                           concat_shared_models=concat_shared_models,
+                                           validate=validate, limit=limit,
+                                           after_row_id=after_row_id):
+            yield from models
+
+        return
+
+    with _context_for_shared_model(pool, concat_shared_models, validate) as convert_models:
+        for record in query_records(pool, type_, where, fields=(_JSON_FIELD, _ROW_ID_FIELD),
+                                    limit=limit, after_row_id=after_row_id):
+            yield from convert_models(type_, [record])
+
+
+def find_objects_batched(pool:DatabaseConnectionPool, type_:Type[PersistentModelT], where:Where, 
+                         *, fetch_size: Optional[int] = None,
+                         concat_shared_models: bool = False,
+                         validate: bool = False,
+                         limit: int | None = None,
+                         after_row_id: int | None = None) -> Iterator[List[PersistentModelT]]:
+    ''' the models are returned as list for each fetched records.
+    for the next page, pass _row_id of the last model as after_row_id. '''
+
+    with _context_for_shared_model(pool, concat_shared_models, validate) as convert_models:
+        for records in query_record_batches(pool, type_, where, fetch_size, 
+                                            fields=(_JSON_FIELD, _ROW_ID_FIELD),
+                                            limit=limit, after_row_id=after_row_id):
+            yield convert_models(type_, records)
 
 
 def _build_shared_model_set(pool:DatabaseConnectionPool, model:PersistentModel, shared_set:Dict[str, Dict[Type, SchemaBaseModel]]):
@@ -157,27 +240,41 @@ def _concat_shared_models_recursively(model:PersistentModel, shared_set:Dict[str
 
 
 @contextmanager
-def _context_for_shared_model(pool:DatabaseConnectionPool, concat_shared_models:bool):
+def _context_for_shared_model(pool:DatabaseConnectionPool, concat_shared_models:bool, 
+                              validate:bool = True):
     shared_set = {}
 
-    def convert_model(type_:Type, record:Dict[str, Any]):
-        model = _convert_record_to_model(type_, record)
+    def convert_models(type_:Type, records:List[Dict[str, Any]]):
+        models = _convert_records_to_models(type_, records, validate)
 
         if concat_shared_models:
-            _build_shared_model_set(pool, model, shared_set)
-            _concat_shared_models_recursively(model, shared_set)
+            for model in models:
+                _build_shared_model_set(pool, model, shared_set)
+                _concat_shared_models_recursively(model, shared_set)
+
+        return models
 
-        return model
+    yield convert_models
 
-    yield convert_model
 
 def _convert_record_to_model(type_:Type[PersistentModelT], record:Dict[str, Any]) -> PersistentModelT:
-    model = type_.parse_raw(record[_JSON_FIELD].encode())
-    model._row_id = record[_ROW_ID_FIELD]
+    return _convert_records_to_models(type_, [record])[0]
+
+
+def _convert_records_to_models(type_:Type[PersistentModelT], 
+                               records:List[Dict[str, Any]],
+                               validate:bool = True) -> List[PersistentModelT]:
+    # orjson accepts str directly, so we don't need to encode it like parse_raw.
+    # if validate is False, the json is trusted because it was dumped by the model.
+    convert = type_.parse_obj if validate else functools.partial(construct_model, type_)
+
+    models = [convert(orjson.loads(record[_JSON_FIELD])) for record in records]
 
-    model._after_load()
+    for model, record in zip(models, records):
+        model._row_id = record[_ROW_ID_FIELD]
+        model._after_load()
 
-    return model
+    return models
 
 
 # In where or fields, the nested expression for json path can be used.
@@ -188,6 +285,8 @@ def _convert_record_to_model(type_:Type[PersistentModelT], record:Dict[str, Any]
 #
 # for paging the result, we will use offset, limit and order by.
 # if such feature is used, the whole used fields of table will be scaned.
+# if after_row_id is given instead of offset, the rows are ordered by row id and 
+# the rows after the given row id are returned. it does not scan skipped rows.
 # It takes a time for scanning because JSON_EXTRACT is existed in view defintion.
 # So, we will build core tables for each table, which has _row_id and fields which is referenced
 # in where field. the core tables will be joined. then joined table will be call as base
@@ -204,9 +303,31 @@ def query_records(pool: DatabaseConnectionPool,
                   order_by: Tuple[str, ...] = tuple(),
                   limit: int | None = None,
                   offset: int | None = None,
-                  joined: Dict[str, Type[PersistentModelT]] | None = None
+                  joined: Dict[str, Type[PersistentModelT]] | None = None,
+                  after_row_id: int | None = None
                   ) -> Iterator[Dict[str, Any]]:
 
+    for records in query_record_batches(pool, type_, where, fetch_size, fields, 
+                                        order_by, limit, offset, joined, after_row_id):
+        yield from records
+
+
+def query_record_batches(pool: DatabaseConnectionPool, 
+                         type_: Type[PersistentModelT], 
+                         where: Where,
+                         fetch_size: Optional[int] = None,
+                         fields: Tuple[str, ...] = (_JSON_FIELD, _ROW_ID_FIELD),
+                         order_by: Tuple[str, ...] = tuple(),
+                         limit: int | None = None,
+                         offset: int | None = None,
+                         joined: Dict[str, Type[PersistentModelT]] | None = None,
+                         after_row_id: int | None = None
+                         ) -> Iterator[List[Dict[str, Any]]]:
+    ''' same as query_records, but the records are returned as fetched. '''
+
+    if after_row_id is not None:
+        where, order_by = get_where_and_order_by_after_row_id(where, order_by, after_row_id)
+
     query_and_param = get_query_and_args_for_reading(
         type_, fields, where, order_by=order_by, limit=limit, offset=offset, 
         ns_types=joined)
@@ -214,46 +335,98 @@ def query_records(pool: DatabaseConnectionPool,
     with pool.open_cursor() as cursor:
         cursor.execute(*query_and_param)
 
+        if fetch_size is None:
+            # fetchmany without size will return only one record at once.
+            if results := cursor.fetchall():
+                yield list(results)
+
+            return
+
         while results := cursor.fetchmany(fetch_size):
-            yield from results
+            yield list(results)
  
 
-def _iterate_types_for_creating_order(types:Iterable[Type[ModelT]]) -> Iterator[Type[ModelT]]:
+# the relation of types is fixed when class is defined. so, the order is cached.
+@functools.cache
+def _get_types_for_creating_order(types:Tuple[Type, ...]) -> Tuple[Type, ...]:
+    return tuple(_iterate_types_for_creating_order(types))
+
+
+def _iterate_types_for_creating_order(types:Iterable[Type]) -> Iterator[Type]:
     to_be_created = deque(types)
+    # deque keeps the order and set is used for checking that type is not created yet.
+    pending = set(to_be_created)
+
+    while to_be_created:
+        type_ = to_be_created.popleft()
+
+        if type_ not in pending:
+            # it was already created as part of its container.
+            continue
 
-    while to_be_created and (type_ := to_be_created.popleft()):
         container = get_container_type(type_)
 
-        if container in to_be_created:
+        if container in pending:
             to_be_created.append(type_)
         else:
+            pending.remove(type_)
+
             yield type_
 
             for part_type in _traverse_all_part_types(type_):
                 yield part_type
 
-                if part_type in to_be_created:
-                    to_be_created.remove(part_type)
+                pending.discard(part_type)
+
+
+@functools.cache
+def _traverse_all_part_types(type_:Type) -> Tuple[Type, ...]:
+    return tuple(_iterate_all_part_types(type_))
 
 
-def _traverse_all_part_types(type_:Type[ModelT]):
+def _iterate_all_part_types(type_:Type) -> Iterator[Type]:
     for part_type in get_part_types(type_):
         yield part_type
         yield from _traverse_all_part_types(part_type)
 
 
-def _upsert_parts_and_externals(cursor, root_inserted_id:int, type_:Type) -> None:
-    args = {
-        '__root_row_id': root_inserted_id,
-    }
+def _upsert_parts_and_externals(cursor, root_inserted_ids:Tuple[int, ...], type_:Type) -> None:
+    # each sql is executed for all root rows at once.
+    args_list = [
+        {'__root_row_id': root_inserted_id} for root_inserted_id in root_inserted_ids
+    ]
+
+    for sql in _get_sqls_for_upserting_parts_and_externals(type_):
+        cursor.executemany(sql, args_list)
+
+
+@functools.cache
+def _get_sqls_for_upserting_parts_and_externals(type_:Type) -> Tuple[str, ...]:
+    # the sqls of nested parts are listed in order of depth first traversal.
+    # for each type, sqls of externals are followed by sqls of parts. 
+    sqls : List[str] = []
+    stack : Deque[Iterator[Tuple[Type, Tuple[str, ...]]]] = deque([iter([(type_, tuple())])])
+
+    while stack:
+        item = next(stack[-1], None)
+
+        if item is None:
+            stack.pop()
+            continue
+
+        current_type, part_sqls = item
 
-    for sql in get_sql_for_upserting_external_index_table(type_):
-        cursor.execute(sql, args)
+        sqls.extend(part_sqls)
+        sqls.extend(get_sql_for_upserting_external_index_table(current_type))
 
-    for (part_type, sqls) in get_sql_for_upserting_parts_table(type_).items():
-        for sql in sqls:
-            cursor.execute(sql, args)
+        stack.append(iter(get_sql_for_upserting_parts_table(current_type).items()))
 
-        _upsert_parts_and_externals(cursor, root_inserted_id, part_type)
+    return tuple(sqls)
 
 
+@register_cache_clearer
+def _clear_cached_storage_infos():
+    _is_part_of_type.cache_clear()
+    _get_types_for_creating_order.cache_clear()
+    _traverse_all_part_types.cache_clear()
+    _get_sqls_for_upserting_parts_and_externals.cache_clear()
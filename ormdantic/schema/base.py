@@ -1,17 +1,21 @@
 from typing import (
     Any, ForwardRef, Tuple, Dict, Type, Generic, TypeVar, Iterator, Callable, Optional,
-    List, ClassVar, cast 
+    List, ClassVar, cast, get_args, get_origin, Union
 )
 import datetime
 import inspect
+import itertools
 import functools
+from types import MappingProxyType
 from uuid import uuid4
 
 import orjson
 
 from pydantic import (
     BaseModel, ConstrainedDecimal, ConstrainedInt, Field, ConstrainedStr, PrivateAttr,
+    ValidationError, Extra
 )
+from pydantic.fields import ModelField, SHAPE_SINGLETON, SHAPE_LIST, SHAPE_TUPLE_ELLIPSIS
 
 from ormdantic.util.hints import is_derived_or_collection_of_derived
 
@@ -21,7 +25,7 @@ from ..util import (
     is_derived_from, resolve_forward_ref, is_list_or_tuple_of,
     resolve_forward_ref_in_args
 )
-from ..util.tools import convert_tuple, unique
+from ..util.tools import convert_tuple
 
 JsonPathAndType = Tuple[Tuple[str,...], Type[Any]]
 StoredFieldDefinitions = Dict[str, JsonPathAndType]
@@ -201,7 +205,12 @@ IdentifiedModelT = TypeVar('IdentifiedModelT', bound=IdentifiedModel)
 
 def get_container_type(type_:Type[ModelT]) -> Optional[Type[ModelT]]:
     ''' get the type of container '''
-    part_type = get_base_generic_type_of(cast(Type, type_), PartOfMixin)
+    return _get_container_type(type_)
+
+
+@functools.cache
+def _get_container_type(type_:Type) -> Optional[Type]:
+    part_type = get_base_generic_type_of(type_, PartOfMixin)
 
     if part_type:
         return get_type_args(part_type)[0]
@@ -209,12 +218,14 @@ def get_container_type(type_:Type[ModelT]) -> Optional[Type[ModelT]]:
     return None
 
 
+@functools.cache
 def get_field_names_for(type_:Type, *types:Type) -> Tuple[str,...]:
     types = convert_tuple(types)
 
     return tuple(field_name for field_name, _ in get_field_name_and_type(type_, *types))
 
 
+@functools.cache
 def get_field_name_and_type(type_:Type, 
                             *target_types: Type,
                             ) -> Tuple[Tuple[str, Type]]:
@@ -246,6 +257,10 @@ def get_field_type(type_:Type[ModelT], field_name:str) -> type:
 
 
 def update_forward_refs(type_:Type[ModelT], localns:Dict[str, Any]):
+    if not _has_forward_refs(type_):
+        # already resolved. nothing will be changed.
+        return
+
     type_.update_forward_refs(**localns)
 
     # resolve outer type also,
@@ -257,6 +272,50 @@ def update_forward_refs(type_:Type[ModelT], localns:Dict[str, Any]):
         
     update_forward_refs_in_generic_base(type_, localns)
 
+    # fields of type are changed, the cached information of types should be dropped.
+    _clear_cached_type_infos()
+
+
+def _has_forward_refs(type_:Type) -> bool:
+    return any(
+        _is_or_has_forward_ref(t) 
+        for t in itertools.chain(
+            (t for f in type_.__fields__.values() for t in (f.type_, f.outer_type_)),
+            getattr(type_, '__orig_bases__', ())
+        )
+    )
+
+
+def _is_or_has_forward_ref(type_:Type) -> bool:
+    # ForwardRef can be nested like List[Tuple[int, Dict[str, 'B']]].
+    return type(type_) is ForwardRef or any(
+        _is_or_has_forward_ref(arg) for arg in getattr(type_, '__args__', None) or ())
+
+
+# the modules which cache information derived from types register the function 
+# for clearing them. they are called when fields of type are changed.
+_cache_clearers : List[Callable[[], None]] = []
+
+
+def register_cache_clearer(clearer:Callable[[], None]) -> Callable[[], None]:
+    _cache_clearers.append(clearer)
+
+    return clearer
+
+
+def _clear_cached_type_infos():
+    for clearer in _cache_clearers:
+        clearer()
+
+    _get_container_type.cache_clear()
+    get_field_names_for.cache_clear()
+    get_field_name_and_type.cache_clear()
+    get_part_types.cache_clear()
+    get_stored_fields.cache_clear()
+    _get_fields_for_assigning_identifier.cache_clear()
+    _get_fields_for_constructing.cache_clear()
+    _needs_parsing.cache_clear()
+
 
 def is_field_list_or_tuple_of(type_:Type, field_name:str, *parameters:Type) -> bool:
     model_field = type_.__fields__[field_name]
@@ -264,9 +323,11 @@ def is_field_list_or_tuple_of(type_:Type, field_name:str, *parameters:Type) -> b
     return is_list_or_tuple_of(model_field.outer_type_, *parameters)
 
 
+@functools.cache
 def get_part_types(type_:Type) -> Tuple[Type]:
+    # dict keeps the order of keys, so it is used for removing duplicated types.
     return tuple(
-        unique(
+        dict.fromkeys(
             model_field.type_
             for model_field in type_.__fields__.values()
             if is_derived_from(model_field.type_, PartOfMixin)
@@ -283,13 +344,8 @@ def get_identifer_of(model:SchemaBaseModel) -> Iterator[Tuple[str, Any]]:
 def assign_identifying_fields_if_empty(model:ModelT, inplace:bool=False) -> ModelT:
     to_be_updated  = None
 
-    for field_name in type(model).__fields__.keys(): 
-        field_value = getattr(model, field_name)
-
-        updated_value = (
-            _replace_scalar_value_if_empty_value(field_value, inplace) 
-            or _replace_vector_if_empty_value(field_value, inplace)
-        )
+    for field_name, replace in _get_fields_for_assigning_identifier(type(model)): 
+        updated_value = replace(getattr(model, field_name), inplace)
 
         if updated_value is not None:
             if to_be_updated is None:
@@ -300,21 +356,86 @@ def assign_identifying_fields_if_empty(model:ModelT, inplace:bool=False) -> Mode
     return to_be_updated or model
 
 
+@functools.cache
+def _get_fields_for_assigning_identifier(type_:Type) -> Tuple[Tuple[str, Callable[[Any, bool], Any]], ...]:
+    # the fields which can hold identifying or part value are returned with
+    # the function for replacing the value. if the declared type does not decide
+    # it like Union, Any or the base class of part, the value is checked at runtime.
+    fields = []
+
+    for field_name, model_field in type_.__fields__.items():
+        field_type = model_field.outer_type_
+
+        if not _can_hold_identifying_value(field_type):
+            continue
+
+        if is_derived_from(field_type, IdentifyingMixin) or is_derived_from(field_type, PartOfMixin):
+            fields.append((field_name, _replace_scalar_value_if_empty_value))
+        elif get_origin(field_type) in (list, tuple) and (
+                is_list_or_tuple_of(field_type, IdentifyingMixin) 
+                or is_list_or_tuple_of(field_type, PartOfMixin)):
+            fields.append((field_name, _replace_vector_if_empty_value))
+        else:
+            # the items of collection like List[SchemaBaseModel] can be parts.
+            fields.append((field_name, _replace_value_if_empty_value))
+
+    return tuple(fields)
+
+
+# the value of these types can't be identifying or part value.
+_NOT_IDENTIFYING_TYPES = (int, float, bool)
+
+
+def _can_hold_identifying_value(type_:Any) -> bool:
+    # the field is skipped only if the declared type proves that the value can't
+    # be replaced. str is not skipped because the value can be IdStr.
+    if type_ in _NOT_IDENTIFYING_TYPES:
+        return False
+
+    if get_origin(type_) in (Union, list, tuple):
+        return any(
+            _can_hold_identifying_value(arg) for arg in get_args(type_) if arg is not Ellipsis)
+
+    return True
+
+
+def _replace_value_if_empty_value(obj:Any, inplace:bool) -> Any:
+    return (
+        _replace_scalar_value_if_empty_value(obj, inplace) 
+        or _replace_vector_if_empty_value(obj, inplace)
+    )
+
+
 def _replace_scalar_value_if_empty_value(obj:Any, inplace:bool) -> Any:
-    if isinstance(obj, IdentifyingMixin):
-        new_value = obj.new_if_empty()
+    replace = _get_scalar_replacer(type(obj))
+
+    return replace(obj, inplace) if replace else None
 
-        if new_value is not obj:
-            return new_value
-    elif isinstance(obj, PartOfMixin) and isinstance(obj, SchemaBaseModel):
-        replaced = assign_identifying_fields_if_empty(obj, inplace)
 
-        if replaced is not obj:
-            return replaced
+@functools.cache
+def _get_scalar_replacer(type_:Type) -> Callable[[Any, bool], Any] | None:
+    # the replacer is decided by the type of value, so we don't need to check
+    # the mro of type for each value.
+    if issubclass(type_, IdentifyingMixin):
+        return _replace_identifying_value_if_empty
+    elif issubclass(type_, PartOfMixin) and issubclass(type_, SchemaBaseModel):
+        return _replace_part_if_empty
 
     return None
 
 
+def _replace_identifying_value_if_empty(obj:IdentifyingMixin, inplace:bool) -> Any:
+    new_value = obj.new_if_empty()
+
+    return new_value if new_value is not obj else None
+
+
+def _replace_part_if_empty(obj:SchemaBaseModel, inplace:bool) -> Any:
+    replaced = assign_identifying_fields_if_empty(obj, inplace)
+
+    return replaced if replaced is not obj else None
+
+
 def _replace_vector_if_empty_value(obj:Any, inplace:bool) -> Any:    
     if isinstance(obj, (list, tuple)):
         if not obj:
@@ -325,11 +446,11 @@ def _replace_vector_if_empty_value(obj:Any, inplace:bool) -> Any:
         for index, item in enumerate(obj):
             replaced = _replace_scalar_value_if_empty_value(item, inplace)
 
-            if not to_be_updated and replaced is not None:
+            if to_be_updated is None and replaced is not None:
                 to_be_updated = list(obj[:index])
 
             if to_be_updated is not None:
-                to_be_updated.append(replaced)
+                to_be_updated.append(item if replaced is None else replaced)
 
         if isinstance(obj, tuple) and to_be_updated:
             to_be_updated = tuple(to_be_updated)
@@ -339,6 +460,89 @@ def _replace_vector_if_empty_value(obj:Any, inplace:bool) -> Any:
     return None
 
 
+# the kind of field for constructing model without validation.
+_VALIDATED = 0
+_PLAIN = 1
+_MODEL = 2
+_MODEL_LIST = 3
+_MODEL_TUPLE = 4
+
+_PLAIN_JSON_TYPES = (str, int, float, bool)
+
+
+def construct_model(type_:Type[ModelT], data:Dict[str, Any]) -> ModelT:
+    ''' make model from the trusted data like the json which was dumped from the model. 
+    The plain json type fields are not validated and the nested models are constructed 
+    in same way. Other fields are validated for converting the value. '''
+    if _needs_parsing(type_):
+        return type_.parse_obj(data)
+
+    values : Dict[str, Any] = {}
+
+    # the data is dumped by dict(), so the keys are the names of fields, not alias.
+    for model_field, kind in _get_fields_for_constructing(type_):
+        if model_field.name not in data:
+            continue
+
+        value = data[model_field.name]
+
+        if value is None or kind == _PLAIN:
+            pass
+        elif kind == _MODEL:
+            value = construct_model(model_field.type_, value)
+        elif kind == _MODEL_LIST:
+            value = [construct_model(model_field.type_, item) for item in value]
+        elif kind == _MODEL_TUPLE:
+            value = tuple(construct_model(model_field.type_, item) for item in value)
+        else:
+            value, errors = model_field.validate(value, values, loc=model_field.alias, cls=type_)
+
+            if errors:
+                raise ValidationError([errors], type_)
+
+        values[model_field.name] = value
+
+    return type_.construct(**values)
+
+
+@functools.cache
+def _needs_parsing(type_:Type) -> bool:
+    # custom root and root validators work on the whole data, so they can not
+    # be handled field by field. the extra keys are kept only by parsing.
+    return bool(
+        type_.__custom_root_type__ 
+        or type_.__pre_root_validators__ 
+        or type_.__post_root_validators__
+        or type_.__config__.extra == Extra.allow
+    )
+
+
+@functools.cache
+def _get_fields_for_constructing(type_:Type) -> Tuple[Tuple[ModelField, int], ...]:
+    return tuple(
+        (model_field, _get_kind_for_constructing(model_field)) 
+        for model_field in type_.__fields__.values()
+    )
+
+
+def _get_kind_for_constructing(model_field:ModelField) -> int:
+    if model_field.class_validators:
+        return _VALIDATED
+
+    if model_field.shape == SHAPE_SINGLETON and model_field.outer_type_ in _PLAIN_JSON_TYPES:
+        return _PLAIN
+
+    if is_derived_from(model_field.type_, BaseModel):
+        if model_field.shape == SHAPE_SINGLETON:
+            return _MODEL
+        elif model_field.shape == SHAPE_LIST:
+            return _MODEL_LIST
+        elif model_field.shape == SHAPE_TUPLE_ELLIPSIS:
+            return _MODEL_TUPLE
+
+    return _VALIDATED
+
+
 def get_stored_fields_for(type_:Type,
                           type_or_predicate: Type[T] | Callable[[Tuple[str, ...], Type], bool]) -> Dict[str, Tuple[Tuple[str,...], Type[T]]]:
     stored = get_stored_fields(type_)
@@ -356,7 +560,9 @@ def get_stored_fields_for(type_:Type,
         }
 
 
-def get_stored_fields(type_:Type):
+# the result is cached, so it is returned as read only mapping.
+@functools.cache
+def get_stored_fields(type_:Type) -> MappingProxyType[str, JsonPathAndType]:
     stored_fields : StoredFieldDefinitions = {
         field_name:(_get_json_paths(field_name, field_type), field_type)
         for field_name, field_type in get_field_name_and_type(type_, StoredMixin)
@@ -376,10 +582,11 @@ def get_stored_fields(type_:Type):
         if is_collection_type and paths[-1] != '$' and paths[0] != '..':
             adjusted[field_name] = (paths + ('$',), field_type)
 
-    return stored_fields | adjusted
+    return MappingProxyType(stored_fields | adjusted)
         
 
-def _get_json_paths(field_name, field_type) -> Tuple[str,...]:
+@functools.cache
+def _get_json_paths(field_name:str, field_type:Type) -> Tuple[str,...]:
     paths: List[str] = []
 
     if is_derived_from(field_type, ArrayIndexMixin):
@@ -390,7 +597,8 @@ def _get_json_paths(field_name, field_type) -> Tuple[str,...]:
     return tuple(paths)
 
 
-def _validate_json_paths(paths:Tuple[str]):
+@functools.cache
+def _validate_json_paths(paths:Tuple[str, ...]):
     if any(not (p == '..' or p.startswith('$.') or p == '$') for p in paths):
         _logger.fatal(f'{paths} has one item which did not starts with .. or $.')
         raise RuntimeError('Invalid path expression. the path must start with $')
@@ -1,5 +1,5 @@
 from .log import get_logger
-from .tools import convert_tuple, unique, digest, convert_as_collection
+from .tools import convert_tuple, digest, convert_as_collection
 from .hints import (
     get_base_generic_type_of, get_type_args, 
     get_mro_with_generic, update_forward_refs_in_generic_base,
@@ -11,7 +11,6 @@ __all__ = [
     'get_logger',
     'convert_tuple',
     'convert_as_collection',
-    'unique',
     'digest',
     'get_base_generic_type_of',
     'get_type_args',
@@ -2,24 +2,30 @@ from typing import (
     get_args, Type, get_origin, Tuple, Any, Generic, Protocol,
     ForwardRef, Dict, Generic, _collect_type_vars, Union
 )
-from inspect import getmro
 import sys
 import copy
 import functools
 
 from .tools import convert_tuple
 
-#@functools.cache
 def get_base_generic_type_of(type_:Type, *generic_types:Type) -> Type | None:
-    generic_types = convert_tuple(generic_types)
+    return _get_base_generic_type_of(type_, convert_tuple(generic_types))
 
-    for base_type in get_mro_with_generic(type_):
-        if any(base_type is t or get_origin(base_type) is t for t in generic_types):
+
+@functools.cache
+def _get_base_generic_type_of(type_:Type, generic_types:Tuple[Type, ...]) -> Type | None:
+    for base_type, origin in _get_mro_and_origin_with_generic(type_):
+        if base_type in generic_types or origin in generic_types:
             return base_type
 
     return None
 
 
+@functools.cache
+def _get_mro_and_origin_with_generic(tp:Type) -> Tuple[Tuple[Type, Type | None], ...]:
+    return tuple((base_type, get_origin(base_type)) for base_type in get_mro_with_generic(tp))
+
+
 def get_type_args(type_:Type) -> Tuple[Any,...]:
     return get_args(type_)
 
@@ -68,14 +74,23 @@ def update_forward_refs_in_generic_base(type_:Type, localns:Dict[str, Any]):
         type_.__orig_bases__ = tuple(
             resolve_forward_ref_in_args(base, localns) for base in type_.__orig_bases__)
 
+        # generic bases are changed, so the cached mro should be dropped.
+        _clear_cached_hints()
+
                 
 def resolve_forward_ref_in_args(base:Type, localns:Dict[str, Any]) -> Type:
     if hasattr(base, '__args__') and any(type(arg) is ForwardRef for arg in base.__args__):
         # List[ForwardRef("Container")] will be same object 
         # though they are declared in different scope.
-        # so, we copy current type and change ForwardRef as evaluated.
-        new_type = copy.deepcopy(base)
-        new_type.__args__ = tuple(resolve_forward_ref(arg, localns) for arg in base.__args__)
+        # so, we make new type which has evaluated ForwardRef.
+        args = tuple(resolve_forward_ref(arg, localns) for arg in base.__args__)
+
+        if hasattr(base, 'copy_with'):
+            # typing's generic alias can be rebuilt with new arguments.
+            return base.copy_with(args)
+
+        new_type = copy.copy(base)
+        new_type.__args__ = args
 
         return new_type
 
@@ -84,10 +99,9 @@ def resolve_forward_ref_in_args(base:Type, localns:Dict[str, Any]) -> Type:
 
 def resolve_forward_ref(type_:Type, localns:Dict[str, Any]) -> Type:
     if type_.__class__ is ForwardRef:
-        globalns = (
-            sys.modules[type_.__module__].__dict__.copy() 
-            if type_.__module__ in sys.modules else {}
-        )
+        # evaluating expression does not change the namespace, so it is not copied.
+        module = sys.modules.get(type_.__module__)
+        globalns = module.__dict__ if module else {}
 
         real_type = type_._evaluate(globalns, localns, set())
     
@@ -108,15 +122,26 @@ def is_derived_from(type_:Type, base_type:Type) -> bool:
     if type_ is base_type:
         return True
 
+    try:
+        return _is_derived_from(type_, base_type)
+    except TypeError:
+        # some generic type can have unhashable arguments. 
+        return _is_derived_from.__wrapped__(type_, base_type)
+
+
+@functools.cache
+def _is_derived_from(type_:Type, base_type:Type) -> bool:
     if hasattr(type_, "__origin__"):
         type_ = get_origin(type_)
 
         if type_ is base_type:
             return True
 
-    if hasattr(type_, '__mro__'):
+    mro = getattr(type_, '__mro__', None)
+
+    if mro is not None:
         # Union does not have __mro__ attribute
-        return any(t is base_type for t in getmro(type_))
+        return base_type in mro
 
     return False
 
@@ -170,3 +195,12 @@ def get_list_or_type_type_parameters(type_:Type) -> Tuple[Type,...] | None:
 
     return None
 
+
+def _clear_cached_hints():
+    _get_base_generic_type_of.cache_clear()
+    get_mro_with_generic.cache_clear()
+    _get_mro_and_origin_with_generic.cache_clear()
+    _is_derived_from.cache_clear()
+    is_list_or_tuple_of.cache_clear()
+    is_derived_or_collection_of_derived.cache_clear()
+    get_list_or_type_type_parameters.cache_clear()
@@ -1,6 +1,6 @@
 from configparser import InterpolationSyntaxError
 from typing import (
-    Tuple, TypeVar, Iterable, Iterator, List, Collection
+    Tuple, TypeVar, List, Collection
 )
 from pydantic import BaseModel
 
@@ -19,15 +19,6 @@ def convert_as_collection(items:List[T]|Tuple[T]|T) -> Collection[T]:
         return (items,)
 
 
-def unique(items:Iterable[T]) -> Iterator[T]:
-    seen = set()
-
-    for item in items:
-        if item not in seen:
-            seen.add(item)
-            yield item
-
-
 def digest(item:str|BaseModel, algorithm:str = 'sha1') -> str:
     if isinstance(item, BaseModel):
         return digest_str(item.json())
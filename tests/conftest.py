@@ -0,0 +1,39 @@
+from typing import List
+
+import pytest
+
+from ormdantic.util.hints import _clear_cached_hints
+from ormdantic.schema.base import (
+    PersistentModel, PartOfMixin, FullTextSearchedStringIndex,
+    update_forward_refs, _clear_cached_type_infos
+)
+from ormdantic.database.queries import _clear_cached_sqls
+from ormdantic.database.storage import _clear_cached_storage_infos
+
+
+# the caches are keyed by model types, so types declared in a test module 
+# are released after the module.
+@pytest.fixture(autouse=True, scope='module')
+def clear_cached_infos():
+    yield
+
+    _clear_cached_storage_infos()
+    _clear_cached_sqls()
+    _clear_cached_type_infos()
+    _clear_cached_hints()
+
+
+# the container whose forward ref to part is resolved after the types are used.
+# the returned function resolves the forward ref.
+@pytest.fixture
+def late_part_models():
+    class LateContainer(PersistentModel):
+        parts: List['LatePart']
+
+    class LatePart(PersistentModel, PartOfMixin[LateContainer]):
+        name: FullTextSearchedStringIndex
+
+    def resolve():
+        update_forward_refs(LateContainer, {'LatePart': LatePart})
+
+    return LateContainer, LatePart, resolve
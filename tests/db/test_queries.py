@@ -10,8 +10,9 @@ from ormdantic.database.queries import (
     get_sql_for_upserting_external_index_table, get_stored_fields, get_table_name, 
     get_sql_for_creating_table, _get_field_db_type, _generate_json_table_for_part_of,
     _build_query_and_fields_for_core_table, field_exprs,
-    get_query_and_args_for_reading,
-    get_sql_for_upserting_parts_table, 
+    get_query_and_args_for_reading, get_where_and_order_by_after_row_id,
+    get_query_and_args_for_reading_row_ids, get_sqls_for_deleting_parts_and_externals,
+    get_sql_for_upserting_parts_table, get_args_for_upserting,
     join_line, 
     _build_namespace_types, _find_join_keys, _extract_fields,
     _ENGINE, _RELEVANCE_FIELD
@@ -352,6 +353,43 @@ def test_get_stored_fields_raise_exception():
     with pytest.raises(RuntimeError, match='.*path must start with \\$.*'):
         get_stored_fields(PathNotStartWithDollar)
 
+    # the exception is not cached. it should be raised again.
+    with pytest.raises(RuntimeError, match='.*path must start with \\$.*'):
+        get_stored_fields(PathNotStartWithDollar)
+
+
+def test_get_stored_fields_cached():
+    class MyModel(PersistentModel):
+        order: StringIndex
+
+    stored = get_stored_fields(MyModel)
+
+    assert stored is get_stored_fields(MyModel)
+
+    with pytest.raises(TypeError):
+        stored['name'] = (('$.name',), StringIndex)  # type: ignore
+
+
+def test_get_args_for_upserting():
+    class SimpleModel(PersistentModel):
+        id: IdStr
+        name: str
+
+    class CustomDumpedModel(SimpleModel):
+        class Config(PersistentModel.Config):
+            json_dumps = lambda v, *, default: '{"dumped": true}'
+
+    class OverriddenModel(SimpleModel):
+        def json(self, *args, **kwargs):
+            return '{"overridden": true}'
+
+    assert {'id': 'a', '__json': b'{"id":"a","name":"n"}'} == get_args_for_upserting(
+        SimpleModel(id=IdStr('a'), name='n'))
+    assert {'id': 'a', '__json': '{"dumped": true}'} == get_args_for_upserting(
+        CustomDumpedModel(id=IdStr('a'), name='n'))
+    assert {'id': 'a', '__json': '{"overridden": true}'} == get_args_for_upserting(
+        OverriddenModel(id=IdStr('a'), name='n'))
+
 
 def test_get_sql_for_upserting_parts_table():
     class Part(PersistentModel, PartOfMixin['Container']):
@@ -416,6 +454,16 @@ def test_get_sql_for_upserting_parts_table():
     ) == sqls[Part][1]
 
 
+def test_get_sql_for_upserting_parts_table_after_update_forward_refs(late_part_models):
+    container, part, resolve = late_part_models
+
+    assert {} == get_sql_for_upserting_parts_table(container)
+
+    resolve()
+
+    assert [part] == list(get_sql_for_upserting_parts_table(container))
+
+
 def test_get_sql_for_upserting_parts_table_with_container_fields():
     class Part(PersistentModel, PartOfMixin['Container']):
         _stored_fields: ClassVar[StoredFieldDefinitions]  = {
@@ -475,6 +523,27 @@ def test_get_sql_for_upserting_parts_table_with_container_fields():
 
 
 
+def test_get_sql_for_upserting_parts_table_for_multiple_part_types():
+    class Part1(PersistentModel, PartOfMixin['Container']):
+        order: StringIndex
+
+    class Part2(PersistentModel, PartOfMixin['Container']):
+        order: StringIndex
+
+    class Container(PersistentModel):
+        part1: Part1
+        part2: Part2
+
+    update_forward_refs(Part1, locals())
+    update_forward_refs(Part2, locals())
+    sqls = get_sql_for_upserting_parts_table(Container)
+
+    assert len(sqls[Part1]) == 2
+    assert len(sqls[Part2]) == 2
+    assert all('md_Part2_pbase' in sql for sql in sqls[Part2])
+    assert sqls is get_sql_for_upserting_parts_table(Container)
+
+
 def test_get_sql_for_upserting_external_index_table():
     class Part(PersistentModel, PartOfMixin['Container']):
         _stored_fields: StoredFieldDefinitions = {
@@ -552,6 +621,24 @@ def test_get_sql_for_upserting_external_index_table():
     ) == sqls[3]
 
 
+def test_get_sqls_for_deleting_parts_and_externals():
+    class Part(PersistentModel, PartOfMixin['Container']):
+        order: StringIndex
+        codes: StringArrayIndex
+
+    class Container(PersistentModel):
+        codes: StringArrayIndex
+        parts: List[Part] = Field(default=[])
+
+    update_forward_refs(Part, locals())
+
+    # children are deleted before their parents.
+    assert tuple(
+        join_line(f"DELETE FROM {table_name}", "WHERE `__root_row_id` IN %(__root_row_ids)s")
+        for table_name in ['md_Container_codes', 'md_Part_codes', 'md_Part_pbase']
+    ) == get_sqls_for_deleting_parts_and_externals(Container)
+
+
 def test_get_sql_for_upserting_parts_table_throws_if_invalid_path():
     class InvalidPath(PersistentModel, PartOfMixin['MyModel']):
         _stored_fields: ClassVar[StoredFieldDefinitions] = {
@@ -615,6 +702,46 @@ def test_get_query_and_args_for_reading_for_matching():
     } == args
 
 
+def test_get_query_and_args_for_reading_reuse_sql_for_same_shape():
+    class MyModel(PersistentModel):
+        order: StringIndex
+
+    sql1, args1 = get_query_and_args_for_reading(MyModel, ('order',), (('order', '=', '1'),))
+    sql2, args2 = get_query_and_args_for_reading(MyModel, ('order',), (('order', '=', '2'),))
+
+    assert sql1 is sql2
+    assert {'ORDER': '1'} == args1
+    assert {'ORDER': '2'} == args2
+
+
+def test_get_query_and_args_for_reading_row_ids():
+    class MyModel(PersistentModel):
+        order: StringIndex
+
+    class IdentifiedByCode(PersistentModel):
+        code: IdStr
+        name: StringIndex
+
+    assert get_query_and_args_for_reading_row_ids(MyModel, [{'order': '1'}]) is None
+
+    assert (
+        join_line(
+            'SELECT `__row_id` FROM md_IdentifiedByCode',
+            'WHERE (`code`) IN %(__identifiers)s'
+        ),
+        {'__identifiers': (('a',), ('b',))}
+    ) == get_query_and_args_for_reading_row_ids(IdentifiedByCode, [{'code': 'a'}, {'code': 'b'}])
+
+
+def test_get_where_and_order_by_after_row_id():
+    assert (
+        (('name', '=', 'a'), ('__row_id', '>', 10)), ('__row_id',)
+    ) == get_where_and_order_by_after_row_id((('name', '=', 'a'),), tuple(), 10)
+
+    with pytest.raises(RuntimeError, match='order_by cannot.*'):
+        get_where_and_order_by_after_row_id(tuple(), ('name',), 10)
+
+
 def test_get_query_and_args_for_reading_for_order_by():
     class MyModel(PersistentModel):
         order: FullTextSearchedStr
@@ -774,12 +901,13 @@ def test_extract_fields():
     assert ('field',) == _extract_fields(fields, 'prefix.prefix2')
 
 
-def test_build_join():
+@pytest.fixture(scope='module')
+def reference_models():
     class ReferencedByName(PersistentModel):
-        name: StringIndex
+        name_ref: StringIndex
 
     class NameReference(StringReference[ReferencedByName]):
-        _target_field = 'name'
+        _target_field = 'name_ref'
 
     class ReferencedByCode(PersistentModel):
         code: StringIndex
@@ -799,6 +927,12 @@ def test_build_join():
         id: IdReference
         name: StringIndex
 
+    return StartModel, ReferencedByCode, ReferencedByName, ReferencedById
+
+
+def test_build_join(reference_models):
+    StartModel, ReferencedByCode, ReferencedByName, ReferencedById = reference_models
+
     assert [
         ('', StartModel),
         ('code', ReferencedByCode)
@@ -819,30 +953,8 @@ def test_build_join():
     ] == list(_build_namespace_types(ReferencedById, {'start': StartModel}, {'start.code.name'}))
 
 
-def test_find_join_keys():
-    class ReferencedByName(PersistentModel):
-        name_ref: StringIndex
-
-    class NameReference(StringReference[ReferencedByName]):
-        _target_field = 'name_ref'
-
-    class ReferencedByCode(PersistentModel):
-        code: StringIndex
-        name: NameReference
-
-    class CodeReference(StringReference[ReferencedByCode]):
-        _target_field = 'code'
-
-    class ReferencedById(PersistentModel):
-        id: IntIndex
-
-    class IdReference(StringReference[ReferencedById]):
-        _target_field = 'id'
-
-    class StartModel(PersistentModel):
-        code: CodeReference
-        id: IdReference
-        name: StringIndex
+def test_find_join_keys(reference_models):
+    StartModel, ReferencedByCode, ReferencedByName, ReferencedById = reference_models
 
     assert {
     } == _find_join_keys((('',StartModel),))
@@ -865,3 +977,9 @@ def test_find_join_keys():
     with pytest.raises(RuntimeError):
         _find_join_keys((('',StartModel),('name', ReferencedByName)))
 
+    keys = _find_join_keys((('',StartModel), ('code',ReferencedByCode)))
+    assert keys is _find_join_keys((('',StartModel), ('code',ReferencedByCode)))
+
+    with pytest.raises(TypeError):
+        keys[(StartModel, ReferencedByName)] = ('code', 'code')  # type: ignore
+
@@ -6,7 +6,9 @@ import pytest
 
 from ormdantic.database.storage import (
     delete_objects, query_records, upsert_objects, find_object, 
-    find_objects, build_where
+    find_objects, find_objects_batched, build_where,
+    _iterate_types_for_creating_order, _get_types_for_creating_order,
+    _get_sqls_for_upserting_parts_and_externals
 )
 
 from ormdantic.schema import PersistentModel
@@ -17,7 +19,7 @@ from ormdantic.schema.base import (
 )
 
 from .tools import (
-    use_temp_database_pool_with_model, 
+    use_temp_database_pool_with_model, truncate_tables
 )
 
 class ContainerModel(IdentifiedModel):
@@ -78,13 +80,42 @@ model = ContainerModel(id=IdStr('@'),
                         ])
 
 
-@pytest.fixture
-def pool_and_model():
+# tables are created once for the module and emptied for each test.
+@pytest.fixture(scope='module')
+def model_pool():
     with use_temp_database_pool_with_model(ContainerModel) as pool:
-        upserted = upsert_objects(pool, model)
+        yield pool
+
+
+@pytest.fixture
+def pool_and_model(model_pool):
+    truncate_tables(model_pool)
+    upserted = upsert_objects(model_pool, model)
+
+    yield model_pool, upserted
+
+
+
+def test_build_where():
+    assert (('name', '=', 'sample'),) == build_where([('name', 'sample')])
+    assert (('name', '=', 'sample'), ('id', '=', '@')) == build_where({'name': 'sample', 'id': '@'})
 
-        yield pool, upserted
 
+def test_iterate_types_for_creating_order():
+    assert [ContainerModel, PartModel, SubPartModel] == list(
+        _iterate_types_for_creating_order([SubPartModel, PartModel, ContainerModel]))
+
+
+def test_cached_storage_infos_after_update_forward_refs(late_part_models):
+    container, part, resolve = late_part_models
+
+    assert (container,) == _get_types_for_creating_order((container,))
+    assert tuple() == _get_sqls_for_upserting_parts_and_externals(container)
+
+    resolve()
+
+    assert (container, part) == _get_types_for_creating_order((container,))
+    assert _get_sqls_for_upserting_parts_and_externals(container)
 
 
 def test_upsert_objects(pool_and_model):
@@ -100,6 +131,18 @@ def test_upsert_objects(pool_and_model):
     assert upserted == found
 
 
+def test_upsert_objects_for_multiple_models():
+    with use_temp_database_pool_with_model(ContainerModel) as pool:
+        other = model.copy(update={'id': IdStr('#'), 'name': FullTextSearchedStringIndex('other')})
+
+        upserted = upsert_objects(pool, [model, other])
+        # upserting again updates the same rows.
+        upserted = upsert_objects(pool, upserted)
+
+        assert [model, other] == list(find_objects(pool, ContainerModel, tuple()))
+        assert 4 == len(list(find_objects(pool, PartModel, tuple())))
+
+
 def test_upsert_objects_with_exception(pool_and_model):
     pool, _ = pool_and_model
 
@@ -120,6 +163,14 @@ def test_delete_objects():
 
         assert found is None
 
+        # rows of parts and external indexes are deleted with their container.
+        with pool.open_cursor() as cursor:
+            for table_name in ['md_PartModel_pbase', 'md_SubPartModel_pbase', 
+                               'md_SubPartModel_codes', 'md_SubPartModel__part_codes']:
+                cursor.execute(f'SELECT COUNT(*) AS COUNT FROM {table_name}')
+
+                assert [{'COUNT': 0}] == cursor.fetchall()
+
 
 def test_find_object(pool_and_model):
     pool, _ = pool_and_model
@@ -146,6 +197,27 @@ def test_find_objects(pool_and_model):
     assert next(found, None) is None
 
 
+def test_find_objects_batched(pool_and_model):
+    pool, _ = pool_and_model
+
+    found = find_objects_batched(pool, PartModel, tuple(), fetch_size=1)
+
+    assert [model.parts[0]] == next(found)
+    assert [model.parts[1]] == next(found)
+    assert next(found, None) is None
+
+
+def test_find_objects_after_row_id(pool_and_model):
+    pool, _ = pool_and_model
+
+    first = next(find_objects(pool, PartModel, tuple(), limit=1, after_row_id=0))
+    assert first == model.parts[0]
+
+    found = find_objects(pool, PartModel, tuple(), limit=1, after_row_id=first._row_id)
+    assert next(found) == model.parts[1]
+    assert next(found, None) is None
+
+
 def test_find_objects_for_multiple_nested_parts(pool_and_model):
     pool, _ = pool_and_model
 
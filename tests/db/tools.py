@@ -1,6 +1,6 @@
 from typing import Iterator, Dict, Any, Optional, Type
 from uuid import uuid4
-from pymysql import Connection, connect
+from pymysql import Connection
 from pymysql.cursors import DictCursor
 from contextlib import contextmanager
 
@@ -67,17 +67,21 @@ def use_random_database_pool(keep_database_when_except:bool = False) -> Iterator
             _drop_database(connection, database_name)
 
 
+# connections without database are reused for creating and dropping 
+# databases through the session.
+_admin_pool = DatabaseConnectionPool(_config | {_DATABASE:None})
+
+
 @contextmanager
 def _create_database(database_name:str) -> Iterator[Connection]:
-    connection = connect(**(_config | {_DATABASE:None}))
-    cursor = connection.cursor()
-    cursor.execute("CREATE DATABASE IF NOT EXISTS {}".format(database_name))
+    with _admin_pool.connect() as connection:
+        cursor = connection.cursor()
+        cursor.execute("CREATE DATABASE IF NOT EXISTS {}".format(database_name))
 
-    try:
-        yield connection
-    finally:
-        cursor.close()
-        connection.close()
+        try:
+            yield connection
+        finally:
+            cursor.close()
 
 
 def _drop_database(connection : Connection, database_name:str) -> None:
@@ -94,6 +98,17 @@ def use_temp_database_pool_with_model(*args:Type) -> Iterator[DatabaseConnection
         yield pool
 
 
+def truncate_tables(pool:DatabaseConnectionPool) -> None:
+    # views are derived from tables, so only base tables are truncated.
+    with pool.open_cursor(True) as cursor:
+        cursor.execute(
+            "SELECT TABLE_NAME FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'")
+
+        for row in cursor.fetchall():
+            cursor.execute(f"TRUNCATE TABLE `{row['TABLE_NAME']}`")
+
+
 @contextmanager
 def use_temp_database_cursor_with_model(*models:PersistentModel, 
                                         model_created: bool = True,
@@ -1,14 +1,17 @@
-from typing import Any, cast, List, Tuple, Type
+from typing import Any, cast, Dict, List, Tuple, Type, Union
+from datetime import date
 import uuid
 
+import orjson
 import pytest
-from pydantic import ConstrainedStr, parse_raw_as
+from pydantic import BaseModel, ConstrainedStr, Extra, Field, parse_raw_as, root_validator
 
 from ormdantic.schema.base import (
     IdentifiedModel, IdentifyingMixin, PersistentModel, PartOfMixin, 
     assign_identifying_fields_if_empty, get_container_type, 
     get_field_name_and_type, get_identifer_of, get_field_names_for, IdStr, 
-    update_forward_refs, is_field_list_or_tuple_of, get_field_type
+    update_forward_refs, is_field_list_or_tuple_of, get_field_type, get_part_types,
+    construct_model, SchemaBaseModel, _get_fields_for_assigning_identifier
 )
 
 def test_identified_model():
@@ -79,6 +82,36 @@ def test_get_field_name_and_type():
         list(get_field_name_and_type(cast(Any, WrongType)))
 
 
+def test_get_part_types_after_update_forward_refs(late_part_models):
+    container, part, resolve = late_part_models
+
+    assert tuple() == get_part_types(container)
+
+    resolve()
+
+    assert (part,) == get_part_types(container)
+
+    # resolved type is not updated again, so the cache is kept.
+    part_types = get_part_types(container)
+    resolve()
+
+    assert part_types is get_part_types(container)
+
+
+def test_update_forward_refs_for_nested_args():
+    class Container(PersistentModel):
+        items: List[Tuple[int, Dict[str, 'Item']]]
+
+    class Item(PersistentModel):
+        name: str
+
+    update_forward_refs(Container, locals())
+
+    model = Container(items=[(1, {'a': Item(name='a')})])
+
+    assert 'a' == model.items[0][1]['a'].name
+
+
 def test_new_if_empty_raise_exception():
     class NotImplementedStr(ConstrainedStr, IdentifyingMixin):
         pass
@@ -123,6 +156,15 @@ def test_assign_identified_if_empty():
     assert replaced.id
   
 
+def test_assign_identified_if_empty_without_identifying_fields():
+    class SimpleModel(PersistentModel):
+        name: str
+
+    model = SimpleModel(name='')
+
+    assert assign_identifying_fields_if_empty(model) is model
+
+
 def test_assign_identified_if_empty_for_vector():
     class SimpleModel(PersistentModel):
         list_ids : List[IdStr] 
@@ -142,6 +184,83 @@ def test_assign_identified_if_empty_for_vector():
     assert replaced.empty_ids is model.empty_ids
 
 
+def test_assign_identified_if_empty_for_union_and_any():
+    class PartA(IdentifiedModel, PartOfMixin['ContainerModel']):
+        code: int
+
+    class PartB(IdentifiedModel, PartOfMixin['ContainerModel']):
+        name: str
+
+    class ContainerModel(PersistentModel):
+        part: Union[PartA, PartB]
+        extra: Union[IdStr, int]
+        anything: Any
+        ids: List[Union[IdStr, int]]
+
+    update_forward_refs(PartA, locals())
+    update_forward_refs(PartB, locals())
+
+    model = ContainerModel(
+        part=PartB(id=IdStr(''), version='', name='b'), 
+        extra=IdStr(''), 
+        anything=IdStr(''),
+        ids=[IdStr(''), IdStr('1')]
+    )
+
+    replaced = assign_identifying_fields_if_empty(model)
+
+    assert isinstance(replaced.part, PartB)
+    assert replaced.part.id
+    assert replaced.extra
+    assert replaced.anything
+    assert replaced.ids[0]
+    assert '1' == replaced.ids[1]
+
+
+def test_assign_identified_if_empty_for_base_type_fields():
+    class SimpleModel(IdentifiedModel, PartOfMixin['ContainerModel']):
+        pass
+
+    class ContainerModel(PersistentModel):
+        part: SchemaBaseModel
+        anyid: str
+        count: int
+
+    update_forward_refs(SimpleModel, locals())
+
+    model = ContainerModel(
+        part=SimpleModel(id=IdStr(''), version=''), anyid=IdStr(''), count=0)
+
+    replaced = assign_identifying_fields_if_empty(model)
+
+    assert cast(SimpleModel, replaced.part).id
+    assert replaced.anyid
+    assert ('part', 'anyid') == tuple(
+        name for name, _ in _get_fields_for_assigning_identifier(ContainerModel))
+
+
+def test_assign_identified_if_empty_for_collection_of_base_type():
+    class SimpleModel(IdentifiedModel, PartOfMixin['ContainerModel']):
+        pass
+
+    class ContainerModel(PersistentModel):
+        parts: List[SchemaBaseModel]
+        tuple_parts: Tuple[SchemaBaseModel, ...]
+
+    update_forward_refs(SimpleModel, locals())
+
+    model = ContainerModel(
+        parts=[SimpleModel(id=IdStr('1'), version=''), SimpleModel(id=IdStr(''), version='')],
+        tuple_parts=(SimpleModel(id=IdStr(''), version=''),)
+    )
+
+    replaced = assign_identifying_fields_if_empty(model)
+
+    assert replaced.parts[0] is model.parts[0]
+    assert cast(SimpleModel, replaced.parts[1]).id
+    assert cast(SimpleModel, replaced.tuple_parts[0]).id
+
+
 def test_assign_identified_if_empty_for_parts():
     class ContainerModel(IdentifiedModel):
         parts : List['SimpleModel']
@@ -207,3 +326,63 @@ def test_assign_identified_if_empty_for_parts():
     replaced = assign_identifying_fields_if_empty(model)
 
     assert replaced is model
+
+
+def test_construct_model():
+    class ContainerModel(IdentifiedModel):
+        name: str
+        parts : List['SimpleModel']
+        part : 'SimpleModel'
+
+    class SimpleModel(IdentifiedModel, PartOfMixin[ContainerModel]):
+        birth_date: date
+        codes: Tuple[str, ...]
+
+    update_forward_refs(ContainerModel, locals())
+
+    model = ContainerModel(
+        id=IdStr('container'), name='container',
+        parts=[SimpleModel(id=IdStr('part1'), birth_date=date(2000, 1, 1), codes=('a',))],
+        part=SimpleModel(id=IdStr('part2'), birth_date=date(2000, 1, 2), codes=tuple())
+    )
+
+    constructed = construct_model(ContainerModel, orjson.loads(model.json()))
+
+    assert model == constructed
+    assert isinstance(constructed.parts[0], SimpleModel)
+    assert date(2000, 1, 1) == constructed.parts[0].birth_date
+    assert ('a',) == constructed.parts[0].codes
+
+
+def test_construct_model_with_alias_and_root():
+    class Tags(BaseModel):
+        __root__: List[str]
+
+    class AliasedModel(PersistentModel):
+        user_name: str = Field('', alias='userName')
+        tags: Tags
+
+    class RootValidatedModel(PersistentModel):
+        count: int
+
+        @root_validator
+        def increase(cls, values):
+            values['count'] += 1
+            return values
+
+    model = AliasedModel.parse_obj({'userName': 'kim', 'tags': ['a']})
+
+    assert model == construct_model(AliasedModel, orjson.loads(orjson.dumps(model.dict())))
+    assert 2 == construct_model(RootValidatedModel, {'count': 1}).count
+
+
+def test_construct_model_with_extra_allowed():
+    class ExtraAllowedModel(PersistentModel):
+        a: int
+
+        class Config(PersistentModel.Config):
+            extra = Extra.allow
+
+    data = {'a': 1, 'other': 2}
+
+    assert ExtraAllowedModel.parse_obj(data).dict() == construct_model(ExtraAllowedModel, data).dict()
@@ -60,6 +60,9 @@ def test_update_forward_refs_in_generic_base():
     class Derived(Base['Item']):
         pass
 
+    # cached before updating should not be remained.
+    assert (ForwardRef('Item'),) == get_type_args(get_base_generic_type_of(Derived, Base))
+
     update_forward_refs_in_generic_base(Derived, locals())
 
     base_type = get_base_generic_type_of(Derived, Base)
@@ -114,21 +117,22 @@ def test_is_derived_from():
     assert not is_derived_from(Item | None, Item)
 
 
-def test_is_collection_type_of():
-    assert is_list_or_tuple_of(List[str], str)
-    assert is_list_or_tuple_of(List[str])
-    assert is_list_or_tuple_of(List)
-    assert is_list_or_tuple_of(List[StringIndex], str)
-
-    assert is_list_or_tuple_of(Tuple[str], str)
-    assert is_list_or_tuple_of(Tuple[str, str], str)
-    assert is_list_or_tuple_of(Tuple[str, ...], str)
-    assert is_list_or_tuple_of(Tuple[str, int], str, int)
-
-    assert not is_list_or_tuple_of(List, int)
-    assert not is_list_or_tuple_of(List[str], int)
-    assert not is_list_or_tuple_of(List[str], StringIndex)
-    assert not is_list_or_tuple_of(int, int)
+@pytest.mark.parametrize('type_, parameters, expected', [
+    (List[str], (str,), True),
+    (List[str], (), True),
+    (List, (), True),
+    (List[StringIndex], (str,), True),
+    (Tuple[str], (str,), True),
+    (Tuple[str, str], (str,), True),
+    (Tuple[str, ...], (str,), True),
+    (Tuple[str, int], (str, int), True),
+    (List, (int,), False),
+    (List[str], (int,), False),
+    (List[str], (StringIndex,), False),
+    (int, (int,), False),
+])
+def test_is_collection_type_of(type_, parameters, expected):
+    assert expected == is_list_or_tuple_of(type_, *parameters)
 
 
 def test_get_collection_type_parameters():